@@ -57,37 +57,388 @@ import json
 from openai import OpenAI
 import os
 import time
+import threading
+import shutil
+import csv
+import hashlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def get_access_token():
-    link    = 'https://api.floricode.com/oauth/token'
+# Basis-URL van de API; te overschrijven voor de lokale replay-server (APIReplay.py)
+BASE_URL = os.getenv("Floricode_BASE_URL", "https://api.floricode.com")
+
+# Concurrency: één gedeelde keep-alive pool voor alle page requests
+MAX_WORKERS    = int(os.getenv("Floricode_MAX_WORKERS", "8"))
+LARGE_ENDPOINTS = {'/VBN/ProductFeature', '/VBN/Name', '/VBN/Product'}
+
+# Tijdelijke fouten (429/5xx, verbroken verbinding) opnieuw proberen met
+# exponentiële backoff; bij 429/503 wordt Retry-After gerespecteerd.
+# POST is alleen de token-aanvraag, en die is veilig te herhalen.
+RETRY = Retry(
+    total=6,
+    backoff_factor=1,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({'GET', 'POST'}),
+    respect_retry_after_header=True,
+    raise_on_status=False,
+)
+
+SESSION = requests.Session()
+for scheme in ('https://', 'http://'):
+    SESSION.mount(scheme, HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=2 * MAX_WORKERS,
+                                      max_retries=RETRY))
+
+# Token cache: één client-credentials token gedeeld door alle requests
+TOKEN_REFRESH_MARGIN = 60   # seconden vóór expiry al vernieuwen
+_token_lock  = threading.Lock()
+_token_cache = {'access_token': None, 'expires_at': 0.0}
+
+def _request_token():
+    link    = f'{BASE_URL}/oauth/token'
 
     data = {
         'grant_type': 'client_credentials',
         'client_id': CLIENT_ID,
         'client_secret': CLIENT_SECRET
     }
-    resp = requests.post(link, data=data, auth=(CLIENT_ID, CLIENT_SECRET))
+    resp = SESSION.post(link, data=data, auth=(CLIENT_ID, CLIENT_SECRET))
     resp.raise_for_status()
-    return resp.json()['access_token']
+    return resp.json()
+
+
+def get_access_token(stale=None):
+    """
+    Geef een geldig access token uit de cache; vraag een nieuw token aan als
+    het (bijna) verlopen is. `stale` is een token dat een 401 kreeg: dat wordt
+    alleen vervangen als niemand anders het intussen al vernieuwd heeft.
+    """
+    with _token_lock:
+        token = _token_cache['access_token']
+        fresh = time.monotonic() < _token_cache['expires_at'] - TOKEN_REFRESH_MARGIN
+        if token and fresh and token != stale:
+            return token
+        js = _request_token()
+        _token_cache['access_token'] = js['access_token']
+        _token_cache['expires_at']   = time.monotonic() + float(js.get('expires_in', 3600))
+        return _token_cache['access_token']
+
+
+def _fetch_page(endpoint, skip, page_size, count=False, query=''):
+    url = f'{BASE_URL}/v2{endpoint}?$top={page_size}&$skip={skip}{query}'
+    if count:
+        url += '&$count=true'
+    token = get_access_token()
+    r = SESSION.get(url, headers={'Authorization': f'Bearer {token}'})
+    if r.status_code == 401:
+        # token ingetrokken of eerder verlopen dan aangekondigd: één keer vernieuwen
+        token = get_access_token(stale=token)
+        r = SESSION.get(url, headers={'Authorization': f'Bearer {token}'})
+    r.raise_for_status()
+    return r.json()
+
+
+def iter_pages(endpoint, page_size=1000, page_pool=None, since=None, start=0):
+    """
+    Yield de pagina's (lijst records) van `endpoint` in volgorde van $skip.
+    Met `page_pool` (ThreadPoolExecutor) worden de overige skip-ranges van
+    grote lijsten parallel opgehaald zodra de eerste pagina de omvang toont,
+    per venster van MAX_WORKERS pagina's zodat het geheugen begrensd blijft.
+    Met `since` (watermark) komen alleen records met een latere
+    change_date_time mee. `start` is de $skip waarmee begonnen wordt (resume).
+    """
+    parallel = page_pool is not None and endpoint in LARGE_ENDPOINTS
+    query    = f'&$filter={WATERMARK_FIELD} gt {since}' if since else ''
+
+    def fetch(skip):
+        return _fetch_page(endpoint, skip, page_size, query=query).get('value', [])
+
+    js    = _fetch_page(endpoint, start, page_size, count=parallel, query=query)
+    first = js.get('value', [])
+    yield first
+    if len(first) < page_size:
+        return
+
+    skip = start + page_size
+    if not parallel:
+        while True:
+            vals = fetch(skip)
+            yield vals
+            if len(vals) < page_size:
+                return
+            skip += page_size
+
+    # zonder $count speculatief doorgaan tot de eerste onvolledige pagina
+    total = js.get('@odata.count')
+    while total is None or skip < int(total):
+        end = skip + MAX_WORKERS * page_size
+        if total is not None:
+            end = min(end, int(total))
+        for vals in page_pool.map(fetch, range(skip, end, page_size)):
+            yield vals
+            if len(vals) < page_size:
+                return
+        skip = end
+
+
+def api_call_all(endpoint, page_size=1000, page_pool=None, since=None):
+    """Haal alle records van `endpoint` op als één lijst (zie iter_pages)."""
+    return [v for page in iter_pages(endpoint, page_size, page_pool, since) for v in page]
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_json(path, obj):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(obj, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _fix_dtypes(df, dtypes):
+    """
+    Geef elke kolom het dtype van de pagina waarin hij voor het eerst
+    voorkwam (`dtypes` wordt bijgewerkt), zodat getallen op elke pagina
+    hetzelfde worden opgemaakt: niet '0.0' op pagina 1 en '1000' op pagina 2.
+    """
+    for col in df.columns:
+        first = dtypes.setdefault(col, str(df[col].dtype))
+        numeric = pd.api.types.is_numeric_dtype(df[col]) and not pd.api.types.is_bool_dtype(df[col])
+        if first == 'float64' and pd.api.types.is_integer_dtype(df[col]):
+            df[col] = df[col].astype('float64')
+        elif first == 'int64' and numeric and df[col].dtype != 'int64':
+            # lege waarden op een latere pagina maken er float van
+            try:
+                df[col] = df[col].astype('Int64')
+            except (TypeError, ValueError):
+                pass
+    return df
+
+
+def write_pages_csv(pages, out, page_size=1000, checkpoint=None, state=None):
+    """
+    Normaliseer en schrijf elke pagina direct naar `out`, zodat het geheugen
+    begrensd blijft tot één pagina. Kolommen die pas in latere pagina's
+    opduiken worden achteraan toegevoegd, net als bij één json_normalize.
+
+    Het dtype van een kolom ligt vast vanaf de eerste pagina waarin hij
+    voorkomt (zie _fix_dtypes).
+
+    Na elke pagina wordt `checkpoint` (json) bijgewerkt met de volgende $skip
+    en de bytes die al in `out + '.part'` staan. Met de `state` uit dat
+    checkpoint gaat een afgebroken download verder waar hij stopte; `pages`
+    moet dan vanaf state['skip'] beginnen.
+    Geeft (aantal rijen, hoogste change_date_time) terug.
+    """
+    state = dict(state or {'skip': 0, 'rows': 0, 'columns': [], 'widened': False,
+                           'mark': None, 'bytes': 0, 'done': False})
+    columns = state['columns']
+    dtypes  = state.setdefault('dtypes', {})
+    body    = out + '.part'
+    if not os.path.exists(body) or os.path.getsize(body) < state['bytes']:
+        raise RuntimeError(f"Checkpoint past niet bij {body}; start opnieuw zonder resume")
+
+    with open(body, 'a', encoding='utf-8', newline='') as f:
+        # een half weggeschreven pagina van de vorige poging weggooien
+        f.truncate(state['bytes'])
+        for page in pages:
+            if page:
+                df = _fix_dtypes(pd.json_normalize(page), dtypes)
+                added = [c for c in df.columns if c not in columns]
+                state['widened'] = state['widened'] or bool(columns and added)
+                columns += added
+                df.reindex(columns=columns).to_csv(f, index=False, header=False)
+                state['rows'] += len(df)
+                if WATERMARK_FIELD in df.columns and df[WATERMARK_FIELD].notna().any():
+                    page_mark = str(df[WATERMARK_FIELD].dropna().astype(str).max())
+                    state['mark'] = page_mark if state['mark'] is None else max(state['mark'], page_mark)
+            state['skip'] += page_size
+            if checkpoint:
+                f.flush()
+                state['bytes'] = os.fstat(f.fileno()).st_size
+                _write_json(checkpoint, state)
+
+    with open(out, 'w', encoding='utf-8', newline='') as f:
+        if not columns:
+            f.write('\n')      # zelfde als een lege DataFrame.to_csv
+        elif not state['widened']:
+            pd.DataFrame(columns=columns).to_csv(f, index=False)
+            with open(body, encoding='utf-8', newline='') as src:
+                shutil.copyfileobj(src, f)
+        else:
+            pd.DataFrame(columns=columns).to_csv(f, index=False)
+            # vroege rijen missen kolommen die later pas verschenen: aanvullen
+            for chunk in pd.read_csv(body, header=None, names=columns, dtype=str,
+                                     keep_default_na=False, chunksize=50_000):
+                chunk.to_csv(f, index=False, header=False)
+    os.remove(body)
+    if checkpoint:
+        state['done'] = True
+        _write_json(checkpoint, state)
+    return state['rows'], state['mark']
+
+
+# Incrementele sync: watermark per endpoint op de laatste change_date_time
+DATA_DIR        = os.getenv("Floricode_DATA_DIR", "C:/Users/Floricode/Desktop/GPC code/Data")
+WATERMARK_PATH  = os.path.join(DATA_DIR, "_watermarks.json")
+WATERMARK_FIELD = 'change_date_time'
+CHECKPOINT_DIR  = os.path.join(DATA_DIR, "_checkpoints")
+MANIFEST_PATH   = os.path.join(DATA_DIR, "_manifest.json")
+ID_KEYS = {
+    '/VBN/Product':             ['product_id'],
+    '/VBN/ProductFeature':      ['product_id', 'feature_type_id'],
+    '/VBN/Name':                ['name_id'],
+    '/VBN/NameType':            ['name_type_id'],
+    '/VBN/Plant':               ['plant_registration_number'],
+    '/VBN/Genus':               ['genus_id'],
+    '/VBN/Species':             ['plant_registration_number', 'species_id'],
+    '/VBN/Cultivar':            ['cultivar_id'],
+    '/VBN/ProductGroup':        ['product_group_id'],
+    '/VBN/FeatureGroup':        ['feature_group_id'],
+    '/VBN/FeatureType':         ['feature_type_id'],
+    '/VBN/FeatureValue':        ['feature_type_id', 'feature_value_id'],
+    '/VBN/RegulatoryFeatureType': ['regulatory_feature_type_id'],
+    '/VBN/Application':         ['application_id'],
+    '/VBN/RegulationType':      ['regulation_type_id'],
+    '/VBN/Language':            ['language_code'],
+}
+
 
+def load_watermarks():
+    if not os.path.exists(WATERMARK_PATH):
+        return {}
+    with open(WATERMARK_PATH, encoding='utf-8') as f:
+        return json.load(f)
 
-def api_call_all(endpoint, page_size=1000):
-    token   = get_access_token()
-    headers = {'Authorization': f'Bearer {token}'}
-    all_vals = []
-    skip      = 0
-    while True:
-        url  = f'https://api.floricode.com/v2{endpoint}?$top={page_size}&$skip={skip}'
-        r    = requests.get(url, headers=headers)
-        r.raise_for_status()
-        js   = r.json()
-        vals = js.get('value', [])
-        all_vals.extend(vals)
-        if len(vals) < page_size:
-            break
-        skip += page_size
-    return all_vals
 
+def save_watermarks(watermarks):
+    _write_json(WATERMARK_PATH, watermarks)
+
+
+def load_manifest():
+    if not os.path.exists(MANIFEST_PATH):
+        return {'lists': {}, 'changed': []}
+    with open(MANIFEST_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def changed_code_lists():
+    """Prefixen (CN, CP, …) waarvan de inhoud in de laatste run veranderde."""
+    return load_manifest()['changed']
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def latest_snapshot(prefix):
+    """Pad van het nieuwste {prefix}YYYYMMDD.txt in DATA_DIR, of None."""
+    if not os.path.isdir(DATA_DIR):
+        return None
+    files = sorted(
+        f for f in os.listdir(DATA_DIR)
+        if f.startswith(prefix) and f[len(prefix):-4].isdigit()
+        and len(f) == len(prefix) + 12 and f.endswith('.txt')
+    )
+    return os.path.join(DATA_DIR, files[-1]) if files else None
+
+
+def _text_dtypes(frame):
+    """
+    dtype per kolom zoals json_normalize hem voor de tekst in `frame` (een
+    met dtype=str ingelezen snapshot) gaf: '5.0' → float64, '5' → int64.
+    """
+    dtypes = {}
+    for col in frame.columns:
+        values = frame[col].dropna()
+        if values.empty or pd.to_numeric(values, errors='coerce').isna().any():
+            continue
+        dtypes[col] = 'float64' if values.str.contains(r'[.eE]').any() else 'int64'
+    return dtypes
+
+
+def merge_delta(snapshot, delta, keys):
+    """
+    Voeg gewijzigde records (`delta`) samen met de vorige `snapshot`:
+    records met dezelfde sleutel worden vervangen, nieuwe komen erbij.
+    """
+    if delta.empty:
+        return snapshot
+    # delta in dezelfde tekstvorm als de snapshot: zelfde dtypes (_fix_dtypes)
+    # en dezelfde to_csv/read_csv-ronde als een volledige download
+    delta = _fix_dtypes(delta.copy(), _text_dtypes(snapshot))
+    delta = pd.read_csv(io.StringIO(delta.to_csv(index=False)), dtype=str)
+    delta = delta.drop_duplicates(subset=keys, keep='last')
+    columns = list(snapshot.columns) + [c for c in delta.columns if c not in snapshot.columns]
+    delta   = delta.reindex(columns=columns)
+
+    # gewijzigde records op hun oude plek vervangen, zodat de volgorde gelijk
+    # blijft aan een volledige download; alleen nieuwe records komen achteraan
+    delta_keys = pd.MultiIndex.from_frame(delta[keys])
+    pos    = delta_keys.get_indexer(pd.MultiIndex.from_frame(snapshot[keys]))
+    hit    = pos >= 0
+    merged = snapshot.reindex(columns=columns).astype(object)
+    merged.loc[hit, :] = delta.iloc[pos[hit]].to_numpy(dtype=object)
+    added  = delta[~pd.RangeIndex(len(delta)).isin(pos[hit])]
+    return pd.concat([merged, added.astype(object)], ignore_index=True)
+
+
+def write_parquet_snapshot(csv_path):
+    """
+    Schrijf naast `csv_path` een Parquet-snapshot met getypeerde kolommen en
+    dictionary-encoded strings. Een kolom wordt alleen numeriek als de tekst
+    exact terug te krijgen is, zodat codes met voorloopnullen tekst blijven.
+    GPC.read_code_list gebruikt een eigen tekst-snapshot (.gpc.parquet).
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    with open(csv_path, encoding='utf-8', newline='') as f:
+        header = next(csv.reader(f), [])
+    out = os.path.splitext(csv_path)[0] + '.parquet'
+    if not header:
+        pq.write_table(pa.table({}), out)
+        return out
+
+    # alles eerst als tekst inlezen; typen bepalen we hieronder zelf
+    table = pa_csv.read_csv(
+        csv_path,
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in header},
+            strings_can_be_null=True,
+        ),
+    )
+
+    columns = []
+    for name, col in zip(table.column_names, table.columns):
+        typed = col
+        for target in (pa.int64(), pa.float64()):
+            try:
+                candidate = pc.cast(col, target)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                continue
+            if pc.all(pc.equal(pc.cast(candidate, pa.string()), col)).as_py() is not False:
+                typed = candidate
+                break
+        if pa.types.is_string(typed.type):
+            typed = pc.dictionary_encode(typed)
+        columns.append(typed)
+
+    pq.write_table(pa.table(columns, names=table.column_names), out, compression='zstd')
+    return out
 
 
 def split_batches(records: list, batch_size: int = 200):
@@ -97,56 +448,159 @@ def split_batches(records: list, batch_size: int = 200):
 
 
 
-def strategy_direct_json():
-    endpoints = [
-        '/VBN/Language',
-        '/VBN/RegulationType',
-        '/VBN/RegulatoryFeatureType',
-        '/VBN/FeatureGroup',
-        '/VBN/FeatureValue',
-        '/VBN/FeatureType',
-        '/VBN/ProductFeature',
-        '/VBN/Application',
-        '/VBN/Product',
-        '/VBN/Plant', 
-        '/VBN/Genus', 
-        '/VBN/Species', 
-        '/VBN/Cultivar', 
-        '/VBN/Name', 
-        '/VBN/NameType',
-        '/VBN/ProductGroup'
-
-    ]
-    prefix_map = {
-        '/VBN/Name': 'CN',
-        '/VBN/NameType': 'CM',
-        '/VBN/Cultivar': 'CC',
-        '/VBN/Genus': 'CG',
-        '/VBN/Plant': 'CT',
-        '/VBN/ProductGroup': 'CO',
-        '/VBN/FeatureGroup': 'CU',
-        '/VBN/FeatureType': 'CE',
-        '/VBN/FeatureValue': 'CV',
-        '/VBN/Product': 'CP',
-        '/VBN/ProductFeature': 'CF',
-        '/VBN/RegulatoryFeatureType': 'CY',
-        '/VBN/Species': 'CS',
-        '/VBN/Application': 'CA',
-        '/VBN/RegulationType': 'CR',
-        '/VBN/Language': 'CL'
-    }
+ENDPOINTS = [
+    '/VBN/Language',
+    '/VBN/RegulationType',
+    '/VBN/RegulatoryFeatureType',
+    '/VBN/FeatureGroup',
+    '/VBN/FeatureValue',
+    '/VBN/FeatureType',
+    '/VBN/ProductFeature',
+    '/VBN/Application',
+    '/VBN/Product',
+    '/VBN/Plant', 
+    '/VBN/Genus', 
+    '/VBN/Species', 
+    '/VBN/Cultivar', 
+    '/VBN/Name', 
+    '/VBN/NameType',
+    '/VBN/ProductGroup'
+
+]
+PREFIX_MAP = {
+    '/VBN/Name': 'CN',
+    '/VBN/NameType': 'CM',
+    '/VBN/Cultivar': 'CC',
+    '/VBN/Genus': 'CG',
+    '/VBN/Plant': 'CT',
+    '/VBN/ProductGroup': 'CO',
+    '/VBN/FeatureGroup': 'CU',
+    '/VBN/FeatureType': 'CE',
+    '/VBN/FeatureValue': 'CV',
+    '/VBN/Product': 'CP',
+    '/VBN/ProductFeature': 'CF',
+    '/VBN/RegulatoryFeatureType': 'CY',
+    '/VBN/Species': 'CS',
+    '/VBN/Application': 'CA',
+    '/VBN/RegulationType': 'CR',
+    '/VBN/Language': 'CL'
+}
+
+
+def strategy_direct_json(concurrent=False, max_workers=MAX_WORKERS, incremental=False,
+                         stream=False, parquet=False,
+                         resume=False):
+    """
+    Download alle VBN-codelijsten naar DATA_DIR/{prefix}{datum}.txt.
+    concurrent:  endpoints (en pagina's van grote lijsten) parallel ophalen
+    incremental: alleen wijzigingen sinds de watermark ophalen en samenvoegen
+    stream:      pagina's direct naar schijf schrijven, met checkpoints
+    parquet:     naast elk .txt-bestand ook een Parquet-snapshot schrijven
+    resume:      verder gaan vanaf de checkpoints van een afgebroken run
+                 (impliceert stream)
+    Bestanden met dezelfde inhoud-hash als de vorige run worden niet opnieuw
+    weggeschreven. Geeft de prefixen terug waarvan de inhoud veranderde.
+    """
+    endpoints  = ENDPOINTS
+    prefix_map = PREFIX_MAP
     today = date.today().strftime("%Y%m%d")
 
-    for ep in endpoints:
-        records = api_call_all(ep)
-        df = pd.json_normalize(records)
+    watermarks = load_watermarks() if incremental else {}
+    new_marks  = {}
+    manifest   = load_manifest()
+    published  = {}
+
+    def unchanged(prefix, digest):
+        """Zelfde inhoud als de vorige run en dat bestand bestaat nog?"""
+        entry = manifest['lists'].get(prefix)
+        return bool(entry and entry['sha256'] == digest
+                    and os.path.exists(os.path.join(DATA_DIR, entry['file'])))
+
+    def publish(prefix, out, digest, rows):
+        if unchanged(prefix, digest):
+            kept = manifest['lists'][prefix]['file']
+            if os.path.basename(out) != kept and os.path.exists(out):
+                os.remove(out)
+            print(f"[Manifest] {prefix} ongewijzigd, {kept} blijft staan")
+            published[prefix] = (manifest['lists'][prefix], False)
+            return
+        if parquet:
+            print(f"[Parquet] snapshot {write_parquet_snapshot(out)}")
+        entry = {'file': os.path.basename(out), 'sha256': digest, 'rows': rows}
+        published[prefix] = (entry, True)
+
+    def export(ep, page_pool=None):
         prefix = prefix_map.get(ep)
         if not prefix:
             raise KeyError(f"Geen prefix mapping voor endpoint {ep}")
-        out = f"C:/Users/Floricode/Desktop/GPC code/Data/{prefix}{today}.txt"
+        out = f"{DATA_DIR}/{prefix}{today}.txt"
+
+        since    = watermarks.get(ep)
+        previous = latest_snapshot(prefix) if incremental else None
+        delta    = bool(since and previous and ep in ID_KEYS)
+
         os.makedirs(os.path.dirname(out), exist_ok=True)
-        df.to_csv(out, index=False)
-        print(f"[Direct JSON] {len(df)} rijen weggeschreven naar {out}")
+        if (stream or resume) and not delta:
+            checkpoint = os.path.join(CHECKPOINT_DIR, f"{prefix}{today}.json")
+            state = load_checkpoint(checkpoint) if resume else None
+            if state and state['done'] and os.path.exists(out):
+                new_marks[ep] = state['mark'] or since
+                print(f"[Resume] {ep} was al klaar ({state['rows']} rijen)")
+                publish(prefix, out, file_digest(out), state['rows'])
+                return
+            if state and not state['done']:
+                print(f"[Resume] {ep} verder vanaf $skip={state['skip']}")
+            else:
+                state = None
+                open(out + '.part', 'w').close()
+            pages = iter_pages(ep, page_pool=page_pool, start=state['skip'] if state else 0)
+            rows, mark = write_pages_csv(pages, out, checkpoint=checkpoint, state=state)
+            new_marks[ep] = mark or since
+            print(f"[Direct JSON] {rows} rijen gestreamd naar {out}")
+            publish(prefix, out, file_digest(out), rows)
+            return
+
+        pages = iter_pages(ep, page_pool=page_pool, since=since if delta else None)
+        df = pd.json_normalize([v for page in pages for v in page])
+        if delta:
+            changed = len(df)
+            df = merge_delta(pd.read_csv(previous, dtype=str), df, ID_KEYS[ep])
+            print(f"[Delta] {ep}: {changed} gewijzigde records sinds {since}")
+        if WATERMARK_FIELD in df.columns and df[WATERMARK_FIELD].notna().any():
+            new_marks[ep] = str(df[WATERMARK_FIELD].dropna().astype(str).max())
+        elif since:
+            new_marks[ep] = since
+
+        text   = df.to_csv(index=False)
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+        if not unchanged(prefix, digest):
+            with open(out, 'w', encoding='utf-8', newline='') as f:
+                f.write(text)
+            print(f"[Direct JSON] {len(df)} rijen weggeschreven naar {out}")
+        publish(prefix, out, digest, len(df))
+
+    if not concurrent:
+        for ep in endpoints:
+            export(ep)
+    else:
+        # endpoints en pagina's in aparte pools, zodat een endpoint-worker
+        # nooit wacht op een pagina die in zijn eigen pool vastzit
+        with ThreadPoolExecutor(max_workers=max_workers) as ep_pool, \
+             ThreadPoolExecutor(max_workers=max_workers) as page_pool:
+            futures = [ep_pool.submit(export, ep, page_pool) for ep in endpoints]
+            for fut in futures:
+                fut.result()
+
+    # watermarks en manifest pas bewaren als alle endpoints gelukt zijn
+    save_watermarks({**load_watermarks(), **new_marks})
+    changed = sorted(prefix for prefix, (_, is_new) in published.items() if is_new)
+    _write_json(MANIFEST_PATH, {
+        'lists':   {**manifest['lists'], **{prefix: entry for prefix, (entry, _) in published.items()}},
+        'changed': changed,
+        'run':     today,
+    })
+    print(f"[Manifest] gewijzigde codelijsten: {', '.join(changed) or 'geen'}")
+    return changed
 
 
 if __name__ == '__main__':
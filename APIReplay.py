@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Opnemen en offline afspelen van de Floricode v2 API.
+
+  record()  haalt de echte (gepagineerde) responses op en bewaart per endpoint
+            alle records als fixture in één json-bestand.
+  serve()   start een lokale HTTP-server die de fixtures serveert met dezelfde
+            $top/$skip/$count/$filter-semantiek, plus instelbare latency en
+            foutinjectie (503 met Retry-After).
+  benchmark() draait APIData.strategy_direct_json tegen die server.
+
+Gebruik:
+  python APIReplay.py record  fixtures/
+  python APIReplay.py serve   fixtures/ --port 8765 --latency 0.05 --error-rate 0.02
+  python APIReplay.py bench   fixtures/ --latency 0.05 --concurrent --stream
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import APIData
+
+
+def _fixture_path(fixtures_dir, endpoint):
+    return os.path.join(fixtures_dir, endpoint.strip('/').replace('/', '_') + '.json')
+
+
+def record(fixtures_dir, endpoints=None, page_size=1000):
+    """Neem alle records van `endpoints` op via de live API (credentials nodig)."""
+    os.makedirs(fixtures_dir, exist_ok=True)
+    for ep in endpoints or APIData.ENDPOINTS:
+        records = APIData.api_call_all(ep, page_size=page_size)
+        with open(_fixture_path(fixtures_dir, ep), 'w', encoding='utf-8') as f:
+            json.dump({'endpoint': ep, 'value': records}, f)
+        print(f"[Record] {ep}: {len(records)} records")
+
+
+def _matches(record, flt):
+    """Alleen de vorm die APIData gebruikt: '<veld> gt <waarde>'."""
+    field, op, value = flt.split(' ', 2)
+    if op != 'gt':
+        raise ValueError(f"Filter niet ondersteund: {flt}")
+    return record.get(field) is not None and str(record[field]) > value
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    server_version = 'FloricodeReplay/1.0'
+
+    def log_message(self, fmt, *args):      # stil, behalve bij fouten
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _inject(self):
+        srv = self.server
+        if srv.latency:
+            time.sleep(srv.latency)
+        if srv.error_rate and srv.rng.random() < srv.error_rate:
+            with srv.lock:
+                srv.stats['errors'] += 1
+            self._send_json(503, {'error': 'injected'}, {'Retry-After': str(srv.retry_after)})
+            return True
+        return False
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urlsplit(self.path).path != '/oauth/token':
+            return self._send_json(404, {'error': 'not found'})
+        with self.server.lock:
+            self.server.stats['tokens'] += 1
+        if self._inject():
+            return
+        self._send_json(200, {'access_token': f'replay-{time.monotonic()}',
+                              'token_type': 'bearer',
+                              'expires_in': self.server.token_ttl})
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if not parts.path.startswith('/v2/'):
+            return self._send_json(404, {'error': 'not found'})
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            return self._send_json(401, {'error': 'unauthorized'})
+        with self.server.lock:
+            self.server.stats['pages'] += 1
+        if self._inject():
+            return
+
+        records = self.server.fixtures.get(parts.path[len('/v2'):])
+        if records is None:
+            return self._send_json(404, {'error': 'no fixture'})
+        q = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        if '$filter' in q:
+            records = [r for r in records if _matches(r, q['$filter'])]
+        skip = int(q.get('$skip', 0))
+        top  = int(q.get('$top', len(records)))
+        payload = {'value': records[skip:skip + top]}
+        if q.get('$count') == 'true':
+            payload['@odata.count'] = len(records)
+        self._send_json(200, payload)
+
+
+def serve(fixtures_dir, port=0, latency=0.0, error_rate=0.0, retry_after=0,
+          token_ttl=3600, seed=0):
+    """
+    Start de replay-server in een achtergrondthread en geef de server terug;
+    `server.base_url` kan als APIData.BASE_URL gebruikt worden.
+    """
+    fixtures = {}
+    for name in os.listdir(fixtures_dir):
+        if name.endswith('.json'):
+            with open(os.path.join(fixtures_dir, name), encoding='utf-8') as f:
+                js = json.load(f)
+            fixtures[js['endpoint']] = js['value']
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), _ReplayHandler)
+    server.daemon_threads = True
+    server.fixtures    = fixtures
+    server.latency     = latency
+    server.error_rate  = error_rate
+    server.retry_after = retry_after
+    server.token_ttl   = token_ttl
+    server.rng         = random.Random(seed)
+    server.lock        = threading.Lock()
+    server.stats       = {'tokens': 0, 'pages': 0, 'errors': 0}
+    server.base_url    = f'http://127.0.0.1:{server.server_address[1]}'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def benchmark(fixtures_dir, latency=0.0, error_rate=0.0, **strategy_kwargs):
+    """Draai strategy_direct_json tegen de replay-server in een tijdelijke DATA_DIR."""
+    server = serve(fixtures_dir, latency=latency, error_rate=error_rate)
+    saved = {k: getattr(APIData, k) for k in
+             ('BASE_URL', 'DATA_DIR', 'WATERMARK_PATH', 'CHECKPOINT_DIR', 'MANIFEST_PATH')}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            APIData.BASE_URL       = server.base_url
+            APIData.DATA_DIR       = tmp
+            APIData.WATERMARK_PATH = os.path.join(tmp, '_watermarks.json')
+            APIData.CHECKPOINT_DIR = os.path.join(tmp, '_checkpoints')
+            APIData.MANIFEST_PATH  = os.path.join(tmp, '_manifest.json')
+            APIData._token_cache.update(access_token=None, expires_at=0.0)
+
+            t0 = time.perf_counter()
+            APIData.strategy_direct_json(**strategy_kwargs)
+            elapsed = time.perf_counter() - t0
+    finally:
+        for k, v in saved.items():
+            setattr(APIData, k, v)
+        APIData._token_cache.update(access_token=None, expires_at=0.0)
+        server.shutdown()
+
+    print(f"[Bench] {strategy_kwargs}: {elapsed:.2f}s, {server.stats}")
+    return {'seconds': elapsed, **server.stats}
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('command', choices=('record', 'serve', 'bench'))
+    ap.add_argument('fixtures')
+    ap.add_argument('--port', type=int, default=8765)
+    ap.add_argument('--latency', type=float, default=0.0)
+    ap.add_argument('--error-rate', type=float, default=0.0)
+    ap.add_argument('--concurrent', action='store_true')
+    ap.add_argument('--stream', action='store_true')
+    ap.add_argument('--incremental', action='store_true')
+    args = ap.parse_args()
+
+    if args.command == 'record':
+        record(args.fixtures)
+    elif args.command == 'serve':
+        srv = serve(args.fixtures, port=args.port, latency=args.latency, error_rate=args.error_rate)
+        print(f"Replay-server op {srv.base_url} (Floricode_BASE_URL); Ctrl+C om te stoppen")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            srv.shutdown()
+    else:
+        benchmark(args.fixtures, latency=args.latency, error_rate=args.error_rate,
+                  concurrent=args.concurrent, stream=args.stream, incremental=args.incremental)
@@ -0,0 +1,68 @@
+import zipfile
+from io import BytesIO
+
+from BedrijfLocatiecodering.sharepoint import (
+    LRUCache, item_key, today_items, fetch_bedrijf_locatie_df,
+)
+from BedrijfLocatiecodering.bedrijfscodering import bedrijfscodering
+from BedrijfLocatiecodering.locatiecodering import locatiecodering
+
+# verwerkte resultaten per (bedrijf-item, locatie-item) inclusief eTags
+_results = LRUCache(max_items=4)
+_zips    = LRUCache(max_items=4)
+
+
+def verwerk_coderingen():
+    """
+    Bedrijf- en locatiecoderingen van vandaag ophalen en verwerken.
+    Het resultaat (DataFrames + foutentabellen) wordt gecached op id + eTag
+    van beide bestanden: na 'fouten bekijken' komt 'downloaden' direct uit
+    de cache, en een nieuw geüpload bestand (andere eTag) wordt opnieuw
+    verwerkt. Geeft None als een van beide bestanden ontbreekt.
+    """
+    items = today_items()               # één listing voor beide bestanden
+    if None in items.values():
+        return None
+
+    key = (item_key(items["bedrijf"]), item_key(items["locatie"]))
+    cached = _results.get(key)
+    if cached is not None:
+        print("♻️ Coderingen uit cache (bestanden ongewijzigd)")
+        return cached
+
+    df_bedrijf, df_locatie = fetch_bedrijf_locatie_df(items)
+    bedrijf_df, errors_bedrijf = bedrijfscodering(df_bedrijf)
+    locatie_in, locatie_uit, errors_locatie = locatiecodering(df_locatie)
+    result = {
+        "key":            key,
+        "bedrijf":        bedrijf_df,
+        "locatie_in":     locatie_in,
+        "locatie_uit":    locatie_uit,
+        "errors_bedrijf": errors_bedrijf,
+        "errors_locatie": errors_locatie,
+    }
+    _results.put(key, result)
+    return result
+
+
+def coderingen_zip(result, datum: str) -> bytes:
+    """ZIP met de drie Excel-bestanden van `result`; per cache-sleutel maar één keer opgebouwd."""
+    key = (result["key"], datum)
+    cached = _zips.get(key)
+    if cached is not None:
+        return cached
+
+    mem_zip = BytesIO()
+    with zipfile.ZipFile(mem_zip, "w", zipfile.ZIP_DEFLATED) as zf:
+        # helper om DF als Excel-bytes te schrijven
+        def add_df_to_zip(df, name: str):
+            buf = BytesIO()
+            df.to_excel(buf, index=False, engine="openpyxl")
+            zf.writestr(name, buf.getvalue())
+
+        add_df_to_zip(result["bedrijf"],     f"bedrijfscodering_{datum}.xls")
+        add_df_to_zip(result["locatie_in"],  f"locatiecodering_{datum}_in.xls")
+        add_df_to_zip(result["locatie_uit"], f"flocatiecodering_{datum}_uit.xls")
+    data = mem_zip.getvalue()
+    _zips.put(key, data)
+    return data
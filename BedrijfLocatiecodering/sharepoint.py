@@ -2,6 +2,10 @@
 import os, msal, requests, io, re, pandas as pd
 from dotenv import load_dotenv
 import datetime as dt
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 load_dotenv()
 today = dt.datetime.today().strftime("%Y%m%d")
 TENANT_ID  = os.getenv("sTENANT_ID")
@@ -25,20 +29,149 @@ def _token() -> str:
 
 HEAD = {"Authorization": f"Bearer {_token()}"}
 
+# ---------- cache -----------------------------------------------------------
+CACHE_MAX_ITEMS = int(os.getenv("SP_CACHE_MAX_ITEMS", "8"))
+CACHE_MAX_BYTES = int(os.getenv("SP_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+def _nbytes(value) -> int:
+    """Geschatte geheugengrootte van DataFrames en bytes (ook in tuples/dicts/lijsten)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_nbytes(v) for v in value)
+    return 0
+
+class LRUCache:
+    """Thread-safe LRU-cache, begrensd op aantal entries én op geheugen (_nbytes)."""
+    def __init__(self, max_items=CACHE_MAX_ITEMS, max_bytes=CACHE_MAX_BYTES):
+        self.max_items, self.max_bytes = max_items, max_bytes
+        self._data = OrderedDict()            # key → (value, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key][0]
+
+    def put(self, key, value):
+        size = _nbytes(value)
+        with self._lock:
+            if key in self._data:
+                self._bytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            # oudste eruit; de nieuwste entry blijft altijd staan
+            while len(self._data) > 1 and (len(self._data) > self.max_items
+                                           or self._bytes > self.max_bytes):
+                self._bytes -= self._data.popitem(last=False)[1][1]
+
+def item_key(item) -> tuple:
+    """Cache-sleutel van een driveItem: id + eTag (cTag als fallback)."""
+    return item["id"], item.get("eTag") or item.get("cTag")
+
+_downloads = LRUCache()
+
+# ---------- lookup --------------------------------------------------------
+LISTING_TTL = int(os.getenv("SP_LISTING_TTL", "60"))       # seconden
+ITEM_FIELDS = "id,name,eTag,cTag,file,lastModifiedDateTime,parentReference"
+_listings = {}                  # (drive_id, patronen) → (tijdstip, gevonden items)
+_listings_lock = threading.Lock()
+
+def _graph_items(url):
+    """Alle items van een Graph-collectie, @odata.nextLink volgend."""
+    while url:
+        resp = requests.get(url, headers=HEAD, timeout=30)
+        resp.raise_for_status()
+        data = resp.json()
+        yield from data.get("value", [])
+        url = data.get("@odata.nextLink")
+
+def _current_item(item):
+    """Actuele ITEM_FIELDS van `item` met één kleine GET, of None als het weg is."""
+    resp = requests.get(
+        f"{GRAPH}/drives/{item['parentReference']['driveId']}/items/{item['id']}"
+        f"?$select={ITEM_FIELDS}", headers=HEAD, timeout=30,
+    )
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return resp.json()
+
+def _newest_matches(items, patterns: dict, found: dict) -> None:
+    """Werk `found` bij met per patroon het laatst gewijzigde bestand in de root-map."""
+    for it in items:
+        if "file" not in it:
+            continue
+        path = it.get("parentReference", {}).get("path")
+        if path is not None and not path.endswith("root:"):
+            continue                    # zoekresultaat uit een submap
+        for key, pattern in patterns.items():
+            best = found[key]
+            if re.search(pattern, it["name"], re.I) and (
+                best is None or it["lastModifiedDateTime"] > best["lastModifiedDateTime"]
+            ):
+                found[key] = it
+
+def _latest_items(drive_id, patterns: dict, search: str = None) -> dict:
+    """
+    Geef per sleutel van `patterns` het item-json van het nieuwste bestand in
+    de root van de drive dat op dat patroon matcht (of None).
+    Met `search` wordt eerst de drive-zoekfunctie gebruikt, zodat alleen
+    kandidaten (met alleen ITEM_FIELDS) over de lijn gaan; wat de zoekindex
+    (nog) niet kent, wordt in de map zelf gezocht. Een volledige uitkomst
+    wordt LISTING_TTL seconden gecached; bij een cache-hit wordt elk item
+    opnieuw opgevraagd, zodat een opnieuw geüpload bestand (zelfde id,
+    nieuwe eTag) niet met de oude eTag uit de download-cache komt.
+    """
+    cache_key = (drive_id, tuple(sorted(patterns.items())))
+    with _listings_lock:
+        hit = _listings.get(cache_key)
+    if hit is not None and time.monotonic() - hit[0] < LISTING_TTL:
+        current = {key: _current_item(it) for key, it in hit[1].items()}
+        if None not in current.values():
+            with _listings_lock:
+                _listings[cache_key] = (hit[0], dict(current))
+            return current
+        # een bestand is verwijderd of verplaatst: opnieuw zoeken
+
+    found = dict.fromkeys(patterns)
+    if search:
+        _newest_matches(_graph_items(
+            f"{GRAPH}/drives/{drive_id}/root/search(q='{search}')"
+            f"?$select={ITEM_FIELDS}&$top=200"
+        ), patterns, found)
+    if None in found.values():
+        # zoekindex loopt achter op net geüploade bestanden: val terug op de map zelf
+        _newest_matches(_graph_items(
+            f"{GRAPH}/drives/{drive_id}/root/children?$select={ITEM_FIELDS}&$top=999"
+        ), patterns, found)
+
+    if None not in found.values():
+        with _listings_lock:
+            _listings[cache_key] = (time.monotonic(), dict(found))
+    return found
+
 def _latest_item(drive_id, pattern: str):
     """Return item-json van het nieuwste bestand dat op `pattern` matcht."""
-    q = f"{GRAPH}/drives/{drive_id}/root/children?$orderby=lastModifiedDateTime desc"
-    while q:
-        data = requests.get(q, headers=HEAD).json()
-        for it in data.get("value", []):
-            if "file" in it and re.search(pattern, it["name"], re.I):
-                return it
-            if "@odata.nextLink" in data:
-                q = data["@odata.nextLink"]
-        q = None
-    return None
+    return _latest_items(drive_id, {"item": pattern})["item"]
 
 def download_as_df(item):
+    """
+    Download en parse het bestand van `item`; een ongewijzigd bestand (zelfde
+    id + eTag) komt uit de cache. Geeft altijd een kopie terug, de
+    verwerking past het DataFrame aan.
+    """
+    cached = _downloads.get(item_key(item))
+    if cached is not None:
+        print(f"♻️ {item['name']} uit cache (eTag ongewijzigd)")
+        return cached.copy()
     raw = requests.get(f"{GRAPH}/drives/{item['parentReference']['driveId']}/items/{item['id']}/content",
                        headers=HEAD).content
     ext = item["name"].split(".")[-1].lower()
@@ -48,15 +181,46 @@ def download_as_df(item):
     df.attrs["parent_id"] = item["parentReference"]["id"]
     print(df.attrs)
     df.attrs["drive_id"]  = item["parentReference"]["driveId"]
-    return df
+    _downloads.put(item_key(item), df)
+    return df.copy()
 
 # ---------- publieks-API ---------------------------------------------------
+def _today() -> str:
+    return dt.datetime.today().strftime("%Y%m%d")
+
+def _today_patterns() -> dict:
+    today = _today()
+    return {                                          # match exact vandaag
+        "bedrijf": rf"bedrijfscoderingen_{today}\.",
+        "locatie": rf"locatiecoderingen_{today}\.",
+    }
+
+def today_items() -> dict:
+    """{'bedrijf': item, 'locatie': item} van vandaag, met één listing van de drive."""
+    return _latest_items(DRIVE_RF, _today_patterns(), search=_today())
+
+def bedrijf_item():
+    return today_items()["bedrijf"]
+
+def locatie_item():
+    return today_items()["locatie"]
+
 def fetch_bedrijf_df():
-    today = dt.datetime.today().strftime("%Y%m%d")
-    itm   = _latest_item(DRIVE_RF, rf"bedrijfscoderingen_{today}\.")   # match exact vandaag
+    itm = bedrijf_item()
     return download_as_df(itm) if itm else None
 
 def fetch_locatie_df():
-    today = dt.datetime.today().strftime("%Y%m%d")
-    itm   = _latest_item(DRIVE_RF, rf"locatiecoderingen_{today}\.")  # match exact vandaag
-    return download_as_df(itm) if itm else None
\ No newline at end of file
+    itm = locatie_item()
+    return download_as_df(itm) if itm else None
+
+def fetch_bedrijf_locatie_df(items=None):
+    """
+    (df_bedrijf, df_locatie) van vandaag: de drive wordt één keer gelist
+    (of `items` van today_items() gebruikt) en beide bestanden worden
+    tegelijk gedownload en geparsed. None voor een ontbrekend bestand.
+    """
+    items = items or today_items()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        futures = {k: pool.submit(download_as_df, it) for k, it in items.items() if it}
+    return tuple(futures[k].result() if k in futures else None
+                 for k in ("bedrijf", "locatie"))
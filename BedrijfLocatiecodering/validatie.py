@@ -0,0 +1,124 @@
+import numpy as np
+import pandas as pd
+
+# Typecodes uit de RFH/GLN-specificatie; alleen N en A worden op inhoud gecontroleerd
+TYPE_PATTERNS = {
+    'N':  r'\d*',
+    'A':  r'[A-Za-z]*',
+    'AN': r'[A-Za-z0-9]*',
+}
+CHECKED_TYPES = ('N', 'A')
+
+# Foutentabel: één rij per bevinding
+ERROR_COLUMNS = ['column', 'row', 'rule', 'value']
+# index 0 = Excel-rij 2 (rij 1 is de header)
+EXCEL_ROW_OFFSET = 2
+
+
+def empty_errors() -> pd.DataFrame:
+    return pd.DataFrame(columns=ERROR_COLUMNS)
+
+
+def validate_rules(df: pd.DataFrame, rules: dict, strip_decimal: bool = True,
+                   row_offset: int = 0) -> pd.DataFrame:
+    """
+    Controleer elke kolom uit `rules` ({kolom: (typecode, maxlengte)}) in één
+    keer met str.len()/str.fullmatch. Geeft een foutentabel (ERROR_COLUMNS)
+    terug, gesorteerd per kolom en rij; `row` is het index-label van df plus
+    `row_offset` (zie errors_from_mask).
+    `strip_decimal` haalt een '.0'-staart weg (getallen die Excel als float las).
+    """
+    found = []
+    for col, (ctype, maxlen) in rules.items():
+        if col not in df.columns:
+            continue
+        values = df[col].fillna('').astype(str)
+        if strip_decimal:
+            values = values.str.removesuffix('.0')
+
+        checks = [(values.str.len().to_numpy() > maxlen, f'length > {maxlen}')]
+        if ctype in CHECKED_TYPES:
+            checks.append((~values.str.fullmatch(TYPE_PATTERNS[ctype]).to_numpy(bool), f'type {ctype}'))
+        for order, (mask, rule) in enumerate(checks):
+            pos = np.flatnonzero(mask)
+            if len(pos):
+                found.append(pd.DataFrame({
+                    'column': col,
+                    'row':    values.index[pos] + row_offset,
+                    'rule':   rule,
+                    'value':  values.to_numpy()[pos],
+                    '_pos':   pos,
+                    '_order': order,
+                }))
+    if not found:
+        return empty_errors()
+    errors = pd.concat(found, ignore_index=True)
+    # volgorde zoals voorheen: per kolom, per rij, eerst lengte dan type
+    errors['_col'] = errors['column'].map({c: i for i, c in enumerate(rules)})
+    errors = errors.sort_values(['_col', '_pos', '_order'], kind='stable')
+    return errors[ERROR_COLUMNS].reset_index(drop=True)
+
+
+def errors_from_mask(column: str, values: pd.Series, mask, rule: str,
+                     row_offset: int = 0) -> pd.DataFrame:
+    """
+    Foutentabel voor de rijen van `values` waar `mask` waar is; `row` is het
+    index-label plus `row_offset` (EXCEL_ROW_OFFSET geeft het Excel-rijnummer).
+    """
+    mask = np.asarray(mask, dtype=bool)
+    picked = values[mask]
+    return pd.DataFrame({
+        'column': column,
+        'row':    picked.index + row_offset,
+        'rule':   rule,
+        # None i.p.v. NaN, zodat de tabel als JSON terug kan naar de API
+        'value':  picked.astype(object).where(picked.notna(), None).to_numpy(),
+    }, columns=ERROR_COLUMNS)
+
+
+def _sorted_by_row(found: list) -> pd.DataFrame:
+    """Voeg per-kolom foutentabellen samen in rij-volgorde (dan kolomvolgorde)."""
+    if not found:
+        return empty_errors()
+    errors = pd.concat(found, ignore_index=True).sort_values(['_pos', '_col'], kind='stable')
+    return errors[ERROR_COLUMNS].reset_index(drop=True)
+
+
+def _contains_semicolon(values: pd.Series) -> np.ndarray:
+    if pd.api.types.is_numeric_dtype(values):
+        return np.zeros(len(values), bool)
+    try:
+        # niet-strings (getallen, NaN) geven NA en tellen niet mee
+        return values.str.contains(';', regex=False).fillna(False).to_numpy(bool)
+    except AttributeError:      # kolom zonder enkele string
+        return np.zeros(len(values), bool)
+
+
+def check_semicolons(df: pd.DataFrame, row_offset: int = 0) -> pd.DataFrame:
+    """Tekstcellen met een ';' (breekt het ;-gescheiden exportformaat), per rij en kolom."""
+    found = []
+    for pos, col in enumerate(df.columns):
+        mask = _contains_semicolon(df[col])
+        if mask.any():
+            found.append(errors_from_mask(col, df[col], mask, 'semicolon', row_offset)
+                           .assign(_col=pos, _pos=np.flatnonzero(mask)))
+    return _sorted_by_row(found)
+
+
+def check_required(df: pd.DataFrame, when: str, columns, row_offset: int = 0) -> pd.DataFrame:
+    """Lege verplichte `columns` in rijen waar kolom `when` is ingevuld, per rij en kolom."""
+    filled = df[when].notna().to_numpy()
+    found = []
+    for pos, col in enumerate(columns):
+        mask = filled & df[col].isna().to_numpy()
+        if mask.any():
+            found.append(errors_from_mask(col, df[col], mask, f'required when {when}', row_offset)
+                           .assign(_col=pos, _pos=np.flatnonzero(mask)))
+    return _sorted_by_row(found)
+
+
+def check_duplicates(df: pd.DataFrame, column: str, row_offset: int = 0) -> pd.DataFrame:
+    """Alle rijen waarvan de (ingevulde) waarde in `column` vaker voorkomt."""
+    values = df[column]
+    mask = values.notna() & values.duplicated(keep=False)
+    return errors_from_mask(column, values, mask.to_numpy(), 'duplicate', row_offset)
@@ -8,7 +8,6 @@ from io import BytesIO
 from pathlib import Path
 import json
 import pandas as pd
-import zipfile
 import pathlib
 import tempfile
 import os
@@ -23,12 +22,10 @@ from sqlmodel import select
 from jose import jwt
 from typing import Dict, List, Optional
 # Import core logic from service modules
-from BedrijfLocatiecodering.bedrijfscodering import bedrijfscodering as proc_bedrijf
-from BedrijfLocatiecodering.locatiecodering import locatiecodering as proc_locatie
-from BedrijfLocatiecodering.sharepoint import fetch_bedrijf_df, fetch_locatie_df
+from BedrijfLocatiecodering.coderingen import verwerk_coderingen, coderingen_zip
 from Plantion.Plantion import clean_gln_to_xls 
 from EDIBULB.EdiBulb import main as edi
-from GPC import export_code_lists, load_to_postgres
+from GPC import export_code_lists, load_to_postgres, stream_code_lists_zip
 from Bio_Certificaat import main as certificate
 from APIData import strategy_direct_json
 from Financieel.omzet import main
@@ -104,11 +101,11 @@ def api_import_excel():
     debug_steps = []
     try:
         debug_steps.append("Starting Floricode data fetch")
-        strategy_direct_json()
-        debug_steps.append("Floricode data fetch completed")
+        changed = strategy_direct_json(concurrent=True)
+        debug_steps.append(f"Floricode data fetch completed (gewijzigd: {changed})")
 
         debug_steps.append("Starting Excel import")
-        out_path = load_to_postgres()
+        out_path = load_to_postgres(changed=changed)
         debug_steps.append(f"Excel import completed: {out_path}")
 
     except Exception as e:
@@ -141,6 +138,14 @@ def api_run_access():
 
     return {"message": "Access-export voltooid", "zip": str(zip_path), "debug": debug_steps}
 
+@app.get("/access/code-lists", tags=["Automations"])
+def download_code_lists():
+    # ZIP van alle C{code}_{datum}.txt, direct uit de database gestreamd (chunked)
+    headers = {
+        "Content-Disposition": f'attachment; filename="codelijsten_{time}.zip"'
+    }
+    return StreamingResponse(stream_code_lists_zip(), media_type="application/zip", headers=headers)
+
 @app.post("/biocertificate/scraper", tags=["Automations"])
 def api_run_biocertificate():
     debug_steps = []
@@ -175,33 +180,18 @@ def api_run_biocertificate():
             
 @app.post("/bedrijflocatie/rfh/download", tags=["Automations"])
 def download_coderingen():
-            # 1) run jouw bestaande logica
-    df_loc = fetch_locatie_df()   
-    df_bedrijf = fetch_bedrijf_df()
-    if df_bedrijf is None or df_loc is None:
+    # 1) ophalen + verwerken (gecached op driveItem id + eTag)
+    try:
+        result = verwerk_coderingen()
+    except Exception as exc:
+        logging.exception("Coderingen genereren mislukte")
+        raise HTTPException(500, f"Fout: {exc}")
+    if result is None:
         raise HTTPException(404, "Geen data gevonden voor bedrijf of locatie")
 
     try:
-        # 2️⃣  Data verwerken → DataFrames
-        bedrijf_df,errors_bedrijf           = proc_bedrijf(df_bedrijf)   # DataFrame
-        locatie1_df, locatie2_df,errors_loc = proc_locatie(df_loc)     # twee DataFrames
-
-        # 3️⃣  Zip opbouwen in geheugen
-        mem_zip = BytesIO()
-        with zipfile.ZipFile(mem_zip, "w", zipfile.ZIP_DEFLATED) as zf:
-            # helper om DF als Excel-bytes te schrijven
-            def add_df_to_zip(df, name: str):
-                buf = BytesIO()
-                df.to_excel(buf, index=False, engine="openpyxl")
-                buf.seek(0)
-                zf.writestr(name, buf.read())
-
-            add_df_to_zip(bedrijf_df,  f"bedrijfscodering_{time}.xls")
-            add_df_to_zip(locatie1_df, f"locatiecodering_{time}_in.xls")
-            add_df_to_zip(locatie2_df, f"flocatiecodering_{time}_uit.xls")
-
-        mem_zip.seek(0)
-
+        # 2️⃣  Zip opbouwen in geheugen (ook gecached)
+        mem_zip = BytesIO(coderingen_zip(result, time))
     except Exception as exc:
         logging.exception("Coderingen genereren mislukte")
         raise HTTPException(500, f"Fout: {exc}")
@@ -212,23 +202,16 @@ def download_coderingen():
     return StreamingResponse(mem_zip, media_type="application/zip", headers=headers)
 @app.post("/bedrijflocatie/rfh/errors", tags=["Automations"])
 def rfh_errors():
-            # 1) run jouw bestaande logica
-    df_loc = fetch_locatie_df()   
-    df_bedrijf = fetch_bedrijf_df()
-    if df_bedrijf is None or df_loc is None:
+    # 1) ophalen + verwerken (gecached op driveItem id + eTag)
+    result = verwerk_coderingen()
+    if result is None:
         raise HTTPException(404, "Geen data gevonden voor bedrijf of locatie")
+    errors_bedrijf, errors_loc = result["errors_bedrijf"], result["errors_locatie"]
 
-    
-    # 2️⃣  Data verwerken → DataFrames
-    bedrijf_df,errors_bedrijf           = proc_bedrijf(df_bedrijf)   # DataFrame
-    locatie1_df, locatie2_df,errors_loc = proc_locatie(df_loc) 
-
-    preview_loc = [str(e) for e in errors_loc[:10]]
-    preview_bed = [str(e) for e in errors_bedrijf][:10]
-    total = len(errors_loc) + len(errors_bedrijf)
+    # foutentabellen (column, row, rule, value) → lijst van records
     payload = {
-        "errors_bedrijf": errors_bedrijf,
-        "errors_locatie": errors_loc,
+        "errors_bedrijf": errors_bedrijf.to_dict(orient="records"),
+        "errors_locatie": errors_loc.to_dict(orient="records"),
         "count_bedrijf": len(errors_bedrijf),
         "count_locatie": len(errors_loc),
         "total": len(errors_bedrijf) + len(errors_loc),
@@ -265,7 +248,7 @@ def run_plantion():
     payload = {
         "removed": list(map(str, removed)),   # zorg dat alles str is
         "count_removed": len(removed),
-        "errors": list(map(str,errors))
+        "errors": errors.to_dict(orient="records")
     }
     return JSONResponse(jsonable_encoder(payload))
 